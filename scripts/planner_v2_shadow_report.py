@@ -1,69 +1,152 @@
 #!/usr/bin/env python3
 import json
-from collections import defaultdict
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback keeps the script dependency-free
+    orjson = None
+
 ROOT = Path(__file__).resolve().parents[1]
 TRACE = ROOT / "trace.log"
 OUT = ROOT / "training" / "out" / "planner_v2_shadow_report.json"
+READ_BUFFER = 1 << 20
+# Below this size worker start-up costs more than parsing the trace serially.
+PARALLEL_MIN_BYTES = 8 << 20
+
+COMPILED, RESPONSE_SENT, FALLBACK, ENTITY_RESOLUTION = range(4)
+STAGE_IDS = {
+    b"planner_v2_compiled": COMPILED,
+    b"planner_v2_response_sent": RESPONSE_SENT,
+    b"planner_v2_fallback": FALLBACK,
+    b"entity_resolution_v2": ENTITY_RESOLUTION,
+}
+
+json_loads = orjson.loads if orjson else json.loads
+
 
+def dump_report(report: dict) -> bytes:
+    if orjson:
+        return orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    return json.dumps(report, indent=2).encode("utf-8")
 
-def parse_trace_line(line: str):
-    # format: "<id> <ts> <stage> <json-details>"
-    parts = line.strip().split(" ", 3)
-    if len(parts) < 4:
+
+def split_trace_line(line: bytes):
+    # format: "<id> <ts> <stage> <json-details>", sliced from raw bytes without decoding
+    line = line.strip()
+    i1 = line.find(b" ")
+    if i1 < 0:
+        return None
+    i2 = line.find(b" ", i1 + 1)
+    if i2 < 0:
         return None
-    req_id, ts, stage, details_raw = parts
+    i3 = line.find(b" ", i2 + 1)
+    if i3 < 0:
+        return None
+    return line[:i1], line[i1 + 1 : i2], line[i2 + 1 : i3], line[i3 + 1 :]
+
+
+def parse_details(details_raw) -> dict:
     try:
-        details = json.loads(details_raw)
+        return json_loads(details_raw)
     except Exception:
-        details = {}
-    return req_id, ts, stage, details
+        return {}
+
+
+def trace_chunks(path: Path) -> list[tuple[int, int]]:
+    size = path.stat().st_size
+    workers = (os.cpu_count() or 1) if size >= PARALLEL_MIN_BYTES else 1
+    step = max(1, -(-size // workers))
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def iter_chunk_lines(path: Path, start: int, end: int):
+    # A line belongs to the chunk containing its first byte.
+    with path.open("rb", buffering=READ_BUFFER) as fh:
+        pos = start
+        if start:
+            fh.seek(start - 1)
+            pos += len(fh.readline()) - 1
+        while pos < end:
+            line = fh.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+
+def reduce_chunk(path: Path, start: int, end: int):
+    # Per-request state is keyed by req_id so the last event of each stage wins.
+    seen_reqs = set()
+    tool_calls = {}
+    resolution_conf = {}
+    succeeded = set()
+    fell_back = set()
+    for line in iter_chunk_lines(path, start, end):
+        parts = split_trace_line(line)
+        if not parts:
+            continue
+        req_id, _ts, stage, details_raw = parts
+        seen_reqs.add(req_id)
+        sid = STAGE_IDS.get(stage)
+        if sid is None:
+            continue
+        # Only the compiled and entity-resolution payloads are read, so other
+        # stages skip JSON decoding entirely.
+        if sid == COMPILED:
+            tool_calls[req_id] = parse_details(details_raw).get("tool_calls", 0)
+        elif sid == RESPONSE_SENT:
+            succeeded.add(req_id)
+        elif sid == FALLBACK:
+            fell_back.add(req_id)
+        else:
+            resolution_conf[req_id] = parse_details(details_raw).get("confidence", 0)
+    return seen_reqs, tool_calls, resolution_conf, succeeded, fell_back
 
 
 def main():
-    per_req = defaultdict(list)
+    seen_reqs = set()
+    tool_calls = {}
+    resolution_conf = {}
+    succeeded = set()
+    fell_back = set()
     if TRACE.exists():
-        for line in TRACE.read_text(encoding="utf-8", errors="ignore").splitlines():
-            parsed = parse_trace_line(line)
-            if not parsed:
-                continue
-            req_id, ts, stage, details = parsed
-            per_req[req_id].append({"ts": ts, "stage": stage, "details": details})
-
-    total = 0
-    planner_attempts = 0
-    planner_success = 0
-    planner_fallback = 0
-    avg_tool_calls = []
-    avg_resolution_conf = []
-    for req_id, events in per_req.items():
-        total += 1
-        by_stage = {e["stage"]: e for e in events}
-        if "planner_v2_compiled" in by_stage:
-            planner_attempts += 1
-            avg_tool_calls.append(by_stage["planner_v2_compiled"]["details"].get("tool_calls", 0))
-        if "planner_v2_response_sent" in by_stage:
-            planner_success += 1
-        if "planner_v2_fallback" in by_stage:
-            planner_fallback += 1
-        if "entity_resolution_v2" in by_stage:
-            avg_resolution_conf.append(by_stage["entity_resolution_v2"]["details"].get("confidence", 0))
+        chunks = trace_chunks(TRACE)
+        starts = [start for start, _ in chunks]
+        ends = [end for _, end in chunks]
+        if len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+                partials = list(pool.map(reduce_chunk, repeat(TRACE), starts, ends))
+        else:
+            partials = list(map(reduce_chunk, repeat(TRACE), starts, ends))
+        # Merge in file order so later chunks override earlier ones.
+        for chunk_reqs, chunk_tools, chunk_conf, chunk_ok, chunk_fallback in partials:
+            seen_reqs |= chunk_reqs
+            tool_calls.update(chunk_tools)
+            resolution_conf.update(chunk_conf)
+            succeeded |= chunk_ok
+            fell_back |= chunk_fallback
 
+    planner_attempts = len(tool_calls)
+    planner_success = len(succeeded)
     report = {
-        "requests_seen": total,
+        "requests_seen": len(seen_reqs),
         "planner_attempts": planner_attempts,
         "planner_success": planner_success,
-        "planner_fallback": planner_fallback,
+        "planner_fallback": len(fell_back),
         "planner_success_rate": (planner_success / planner_attempts) if planner_attempts else 0,
-        "avg_tool_calls": (sum(avg_tool_calls) / len(avg_tool_calls)) if avg_tool_calls else 0,
-        "avg_resolution_confidence": (sum(avg_resolution_conf) / len(avg_resolution_conf))
-        if avg_resolution_conf
+        "avg_tool_calls": (sum(tool_calls.values()) / planner_attempts) if planner_attempts else 0,
+        "avg_resolution_confidence": (sum(resolution_conf.values()) / len(resolution_conf))
+        if resolution_conf
         else 0,
     }
     OUT.parent.mkdir(parents=True, exist_ok=True)
-    OUT.write_text(json.dumps(report, indent=2), encoding="utf-8")
-    print(json.dumps(report, indent=2))
+    raw = dump_report(report)
+    OUT.write_bytes(raw)
+    print(raw.decode("utf-8"))
 
 
 if __name__ == "__main__":
@@ -1,17 +1,65 @@
 #!/usr/bin/env python3
 import json
+from collections.abc import Iterable
+from itertools import islice
 from pathlib import Path
 from random import Random
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback keeps the script dependency-free
+    orjson = None
+
 ROOT = Path(__file__).resolve().parents[1]
 PLAYBOOK = ROOT / "context_playbook.json"
 OUT_DIR = ROOT / "training" / "out"
+WRITE_BUFFER = 1 << 20
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
 SYSTEM = (
     "You are planner v1 for football analytics. "
     "Output strict JSON only with version=plan_v1."
 )
+# Reused encoders: json.dumps builds a new encoder per call when ensure_ascii=False.
+# Rows are written compact (as orjson does); plan content keeps the default
+# separators because it is the assistant's training target.
+ROW_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+PLAN_ENCODER = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def entities_for(entity_key: str) -> dict:
+    return {
+        "team": "Team X" if entity_key == "team" else None,
+        "team_a": "Team A" if entity_key == "compare" else None,
+        "team_b": "Team B" if entity_key == "compare" else None,
+        "player": None,
+        "season": "2023/2024",
+        "match_scope": "last_n",
+    }
+
+
+# Constant plan branches are shared between rows; plans are serialized, never mutated.
+ENTITY_TEMPLATES = {key: entities_for(key) for key in ("team", "compare")}
+RUN_SQL_STEP = {"tool": "run_sql_rpc", "purpose": "retrieve core metrics", "args_template": {"query": "SELECT ..."}}
+ASSUMPTIONS = ["season defaults to 2023/2024"]
+
+
+def dump_row(row: dict) -> bytes:
+    if orjson:
+        return orjson.dumps(row)
+    return ROW_ENCODER(row).encode("utf-8")
+
+
+def write_jsonl(path: Path, rows: Iterable[dict]) -> None:
+    buf = bytearray()
+    with path.open("wb", buffering=WRITE_BUFFER) as f:
+        for row in rows:
+            buf += dump_row(row)
+            buf += b"\n"
+            if len(buf) >= WRITE_BUFFER:
+                f.write(buf)
+                buf.clear()
+        f.write(buf)
 
 
 def mk_row(user_prompt: str, context_intent: str, chart_type: str, metrics: list[str], entity_key="team"):
@@ -19,17 +67,10 @@ def mk_row(user_prompt: str, context_intent: str, chart_type: str, metrics: list
         "version": "plan_v1",
         "intent": "database",
         "context_intent": context_intent,
-        "entities": {
-            "team": "Team X" if entity_key == "team" else None,
-            "team_a": "Team A" if entity_key == "compare" else None,
-            "team_b": "Team B" if entity_key == "compare" else None,
-            "player": None,
-            "season": "2023/2024",
-            "match_scope": "last_n",
-        },
+        "entities": ENTITY_TEMPLATES.get(entity_key) or entities_for(entity_key),
         "metrics": metrics,
         "tool_sequence": [
-            {"tool": "run_sql_rpc", "purpose": "retrieve core metrics", "args_template": {"query": "SELECT ..."}},
+            RUN_SQL_STEP,
             {
                 "tool": "render_mplsoccer",
                 "purpose": "render recommendation",
@@ -38,14 +79,14 @@ def mk_row(user_prompt: str, context_intent: str, chart_type: str, metrics: list
         ],
         "vis_recommendation": {"chart_type": chart_type, "reason": "Best fit for tactical pattern visibility."},
         "confidence": 0.9,
-        "assumptions": ["season defaults to 2023/2024"],
+        "assumptions": ASSUMPTIONS,
         "fallback_if_empty": "relax filters and retry with last_n=10",
     }
     return {
         "messages": [
             {"role": "system", "content": SYSTEM},
             {"role": "user", "content": user_prompt},
-            {"role": "assistant", "content": json.dumps(plan, ensure_ascii=False)},
+            {"role": "assistant", "content": PLAN_ENCODER(plan)},
         ]
     }
 
@@ -73,15 +114,13 @@ def main():
 
     rng = Random(42)
     rng.shuffle(rows)
-    split = max(1, int(len(rows) * 0.8))
-    train, val = rows[:split], rows[split:]
+    split = min(len(rows), max(1, int(len(rows) * 0.8)))
+    train, val = islice(rows, split), islice(rows, split, None)
 
     for path, data in ((OUT_DIR / "planner_train.jsonl", train), (OUT_DIR / "planner_val.jsonl", val)):
-        with path.open("w", encoding="utf-8") as f:
-            for row in data:
-                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        write_jsonl(path, data)
 
-    print(json.dumps({"train": len(train), "val": len(val)}, indent=2))
+    print(json.dumps({"train": split, "val": len(rows) - split}, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,63 +1,119 @@
 #!/usr/bin/env python3
+import hashlib
 import json
+import os
+import pickle
 import re
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice, repeat
 from pathlib import Path
 from random import Random
 
+try:
+    import orjson
+except ImportError:  # stdlib fallback keeps the script dependency-free
+    orjson = None
+
 ROOT = Path(__file__).resolve().parents[1]
 TRACE = ROOT / "trace.log"
 PLAYBOOK = ROOT / "context_playbook.json"
 OUT_DIR = ROOT / "training" / "out"
+READ_BUFFER = 1 << 20
+WRITE_BUFFER = 1 << 20
+# Below this size worker start-up costs more than parsing the trace serially.
+PARALLEL_MIN_BYTES = 8 << 20
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
+json_loads = orjson.loads if orjson else json.loads
+
 SYSTEM = (
     "You are planner v1 for football analytics. "
     "Output strict JSON only with version=plan_v1."
 )
+# Reused encoders: json.dumps builds a new encoder per call when ensure_ascii=False.
+# Rows are written compact (as orjson does); plan content keeps the default
+# separators because it is the assistant's training target.
+ROW_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+PLAN_ENCODER = json.JSONEncoder(ensure_ascii=False).encode
+PROMPT_MARKER = b"prompt_received"
+LAST_N_RE = re.compile(r"\blast\s+\d+\b")
+# Keyword sets are matched as substrings of the lowercased prompt, in priority order.
+CONTEXT_PATTERNS = (
+    ("weakness_profile", re.compile(r"weakness|vulnerable|concede|exploit")),
+    ("pressing_profile", re.compile(r"press|pressing|counter-press")),
+    ("transition_defense", re.compile(r"transition|counter|turnover")),
+)
+VISUAL_RE = re.compile(r"map|heatmap|chart|plot|visual|radar|pizza")
+DATABASE_RE = re.compile(r"show|compare|analyze|weakness|pressing|xg|shots")
+
+# Constant plan branches are shared between rows; plans are serialized, never mutated.
+ENTITY_TEMPLATES = {
+    (compare, match_scope): {
+        "team": None if compare else "Team X",
+        "team_a": "Team A" if compare else None,
+        "team_b": "Team B" if compare else None,
+        "player": None,
+        "season": "2023/2024",
+        "match_scope": match_scope,
+    }
+    for compare in (False, True)
+    for match_scope in ("last_n", "season")
+}
+RUN_SQL_STEP = {"tool": "run_sql_rpc", "purpose": "retrieve tactical metrics", "args_template": {"query": "SELECT ..."}}
+ASSUMPTIONS = ["season defaults to 2023/2024 when not specified"]
+
 
+def dump_row(row: dict) -> bytes:
+    if orjson:
+        return orjson.dumps(row)
+    return ROW_ENCODER(row).encode("utf-8")
 
-def infer_context_intent(prompt: str) -> str:
-    p = prompt.lower()
-    if any(k in p for k in ["weakness", "vulnerable", "concede", "exploit"]):
-        return "weakness_profile"
-    if any(k in p for k in ["press", "pressing", "counter-press"]):
-        return "pressing_profile"
-    if any(k in p for k in ["transition", "counter", "turnover"]):
-        return "transition_defense"
+
+def write_jsonl(path: Path, rows: Iterable[dict]) -> None:
+    buf = bytearray()
+    with path.open("wb", buffering=WRITE_BUFFER) as f:
+        for row in rows:
+            buf += dump_row(row)
+            buf += b"\n"
+            if len(buf) >= WRITE_BUFFER:
+                f.write(buf)
+                buf.clear()
+        f.write(buf)
+
+
+def infer_context_intent(prompt_lc: str) -> str:
+    for context_intent, pattern in CONTEXT_PATTERNS:
+        if pattern.search(prompt_lc):
+            return context_intent
     return "weakness_profile"
 
 
-def infer_intent(prompt: str) -> str:
-    p = prompt.lower()
-    if any(k in p for k in ["map", "heatmap", "chart", "plot", "visual", "radar", "pizza"]):
+def infer_intent(prompt_lc: str) -> str:
+    if VISUAL_RE.search(prompt_lc):
         return "visual"
-    if any(k in p for k in ["show", "compare", "analyze", "weakness", "pressing", "xg", "shots"]):
+    if DATABASE_RE.search(prompt_lc):
         return "database"
     return "general"
 
 
 def build_plan(prompt: str, playbook: dict) -> dict:
-    context_intent = infer_context_intent(prompt)
+    prompt_lc = prompt.lower()
+    context_intent = infer_context_intent(prompt_lc)
     cfg = playbook.get("intents", {}).get(context_intent, {})
-    intent = infer_intent(prompt)
+    intent = infer_intent(prompt_lc)
     chart = cfg.get("default_chart_type", "heatmap")
     metrics = cfg.get("metrics", [])
-    match_scope = "last_n" if re.search(r"\blast\s+\d+\b", prompt.lower()) else "season"
-    plan = {
+    match_scope = "last_n" if LAST_N_RE.search(prompt_lc) else "season"
+    compare = "compare" in prompt_lc or "vs" in prompt_lc
+    return {
         "version": "plan_v1",
         "intent": intent,
         "context_intent": context_intent,
-        "entities": {
-            "team": "Team X",
-            "team_a": None,
-            "team_b": None,
-            "player": None,
-            "season": "2023/2024",
-            "match_scope": match_scope,
-        },
+        "entities": ENTITY_TEMPLATES[(compare, match_scope)],
         "metrics": metrics,
         "tool_sequence": [
-            {"tool": "run_sql_rpc", "purpose": "retrieve tactical metrics", "args_template": {"query": "SELECT ..."}},
+            RUN_SQL_STEP,
             {
                 "tool": "render_mplsoccer",
                 "purpose": "render tactical visualization",
@@ -69,33 +125,34 @@ def build_plan(prompt: str, playbook: dict) -> dict:
             "reason": "Most informative view for this contextual intent.",
         },
         "confidence": 0.88,
-        "assumptions": ["season defaults to 2023/2024 when not specified"],
+        "assumptions": ASSUMPTIONS,
         "fallback_if_empty": "widen scope to last_n=10",
     }
-    if "compare" in prompt.lower() or "vs" in prompt.lower():
-        plan["entities"]["team"] = None
-        plan["entities"]["team_a"] = "Team A"
-        plan["entities"]["team_b"] = "Team B"
-    return plan
 
 
-def parse_trace_prompts(trace_path: Path) -> list[str]:
-    if not trace_path.exists():
-        return []
-    prompts = []
-    pat = re.compile(r"request_start|prompt_received")
-    for line in trace_path.read_text(encoding="utf-8", errors="ignore").splitlines():
-        if not pat.search(line):
-            continue
-        if "prompt_received" not in line:
-            continue
-        try:
-            payload = json.loads(line.split(" ", 3)[-1])
-            prompt = str(payload.get("prompt", "")).strip()
-            if prompt:
-                prompts.append(prompt)
-        except Exception:
-            continue
+def trace_chunks(path: Path) -> list[tuple[int, int]]:
+    size = path.stat().st_size
+    workers = (os.cpu_count() or 1) if size >= PARALLEL_MIN_BYTES else 1
+    step = max(1, -(-size // workers))
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def iter_chunk_lines(path: Path, start: int, end: int):
+    # A line belongs to the chunk containing its first byte.
+    with path.open("rb", buffering=READ_BUFFER) as fh:
+        pos = start
+        if start:
+            fh.seek(start - 1)
+            pos += len(fh.readline()) - 1
+        while pos < end:
+            line = fh.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+
+def dedupe_prompts(prompts: Iterable[str]) -> list[str]:
     dedup = []
     seen = set()
     for p in prompts:
@@ -107,8 +164,68 @@ def parse_trace_prompts(trace_path: Path) -> list[str]:
     return dedup
 
 
+def chunk_prompts(path: Path, start: int, end: int) -> list[str]:
+    prompts = []
+    for line in iter_chunk_lines(path, start, end):
+        if PROMPT_MARKER not in line:
+            continue
+        try:
+            payload = json_loads(line.split(b" ", 3)[-1])
+            prompt = str(payload.get("prompt", "")).strip()
+            if prompt:
+                prompts.append(prompt)
+        except Exception:
+            continue
+    return dedupe_prompts(prompts)
+
+
+def parse_trace_prompts(trace_path: Path) -> list[str]:
+    if not trace_path.exists():
+        return []
+    chunks = trace_chunks(trace_path)
+    starts = [start for start, _ in chunks]
+    ends = [end for _, end in chunks]
+    if len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=len(chunks)) as pool:
+            partials = list(pool.map(chunk_prompts, repeat(trace_path), starts, ends))
+    else:
+        partials = list(map(chunk_prompts, repeat(trace_path), starts, ends))
+    # Chunks are merged in file order, so the first occurrence of each prompt is kept.
+    return dedupe_prompts(chain.from_iterable(partials))
+
+
+def plan_cache_path(playbook_raw: bytes) -> Path:
+    # Keyed on the playbook and this script, so editing either invalidates cached plans.
+    digest = hashlib.blake2b(playbook_raw, digest_size=16)
+    digest.update(Path(__file__).read_bytes())
+    return OUT_DIR / f".plan_cache.{digest.hexdigest()}.pkl"
+
+
+def load_plan_cache(path: Path) -> dict[str, str]:
+    try:
+        with path.open("rb") as f:
+            cache = pickle.load(f)
+    except Exception:
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def save_plan_cache(path: Path, cache: dict[str, str]) -> None:
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    for stale in OUT_DIR.glob(".plan_cache.*.pkl"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+
+
 def main():
-    playbook = json.loads(PLAYBOOK.read_text(encoding="utf-8"))
+    playbook_raw = PLAYBOOK.read_bytes()
+    playbook = json.loads(playbook_raw)
+    cache_path = plan_cache_path(playbook_raw)
+    cached = load_plan_cache(cache_path)
+    plans = {}
     prompts = parse_trace_prompts(TRACE)
     if not prompts:
         prompts = [
@@ -119,26 +236,29 @@ def main():
         ]
     rows = []
     for prompt in prompts:
-        plan = build_plan(prompt, playbook)
+        plan_json = cached.get(prompt)
+        if plan_json is None:
+            plan_json = PLAN_ENCODER(build_plan(prompt, playbook))
+        plans[prompt] = plan_json
         rows.append(
             {
                 "messages": [
                     {"role": "system", "content": SYSTEM},
                     {"role": "user", "content": prompt},
-                    {"role": "assistant", "content": json.dumps(plan, ensure_ascii=False)},
+                    {"role": "assistant", "content": plan_json},
                 ]
             }
         )
 
     rng = Random(42)
     rng.shuffle(rows)
-    split = max(1, int(0.85 * len(rows)))
-    train, val = rows[:split], rows[split:]
+    split = min(len(rows), max(1, int(0.85 * len(rows))))
+    train, val = islice(rows, split), islice(rows, split, None)
     for path, data in ((OUT_DIR / "planner_train.jsonl", train), (OUT_DIR / "planner_val.jsonl", val)):
-        with path.open("w", encoding="utf-8") as f:
-            for row in data:
-                f.write(json.dumps(row, ensure_ascii=False) + "\n")
-    print(json.dumps({"train": len(train), "val": len(val), "source_prompts": len(prompts)}, indent=2))
+        write_jsonl(path, data)
+    if plans != cached:
+        save_plan_cache(cache_path, plans)
+    print(json.dumps({"train": split, "val": len(rows) - split, "source_prompts": len(prompts)}, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,8 +1,8 @@
 #!/usr/bin/env python3
 import json
 import os
-import re
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -28,26 +28,38 @@ def has_vis(text: str) -> bool:
     return "VIS_RECOMMENDATION:" in (text or "")
 
 
+def run_case(case: dict) -> dict:
+    payload = {"model": "openai/gpt-4o-mini", "messages": [{"role": "user", "content": case["prompt"]}]}
+    try:
+        data = post_json(API_URL, payload)
+        text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        return {
+            "prompt": case["prompt"],
+            "ok": True,
+            "has_vis": has_vis(text),
+            "has_image": bool(data.get("image", {}).get("image_base64")),
+            "tool_calls_detected": count_tool_mentions(data),
+            "response": text[:400],
+        }
+    except Exception as error:
+        return {"prompt": case["prompt"], "ok": False, "error": str(error)}
+
+
+def count_tool_mentions(value) -> int:
+    # Same count as "tool_" occurrences in json.dumps(value), without serializing.
+    if isinstance(value, str):
+        return value.count("tool_")
+    if isinstance(value, dict):
+        return sum(count_tool_mentions(k) + count_tool_mentions(v) for k, v in value.items())
+    if isinstance(value, list):
+        return sum(count_tool_mentions(v) for v in value)
+    return 0
+
+
 def main():
-    results = []
-    for case in CASES:
-        payload = {"model": "openai/gpt-4o-mini", "messages": [{"role": "user", "content": case["prompt"]}]}
-        try:
-            data = post_json(API_URL, payload)
-            text = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-            tool_calls = re.findall(r"tool_", json.dumps(data))
-            results.append(
-                {
-                    "prompt": case["prompt"],
-                    "ok": True,
-                    "has_vis": has_vis(text),
-                    "has_image": bool(data.get("image", {}).get("image_base64")),
-                    "tool_calls_detected": len(tool_calls),
-                    "response": text[:400],
-                }
-            )
-        except Exception as error:
-            results.append({"prompt": case["prompt"], "ok": False, "error": str(error)})
+    # Cases are independent, so their server round-trips overlap; map keeps CASES order.
+    with ThreadPoolExecutor(max_workers=len(CASES)) as pool:
+        results = list(pool.map(run_case, CASES))
 
     total = len(results)
     ok = [r for r in results if r.get("ok")]
@@ -1,35 +1,89 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel
 from typing import List, Optional
 import base64
+import hashlib
 import io
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 import numpy as np
-from mplsoccer import Pitch, VerticalPitch, Radar, PyPizza, Bumpy
-from matplotlib.colors import LinearSegmentedColormap
-from matplotlib.patches import Patch
-from matplotlib.lines import Line2D
-from matplotlib import font_manager
-from matplotlib import image as mpimg
+import orjson
 from pathlib import Path
 
 
-app = FastAPI()
+class ORJSONRequest(Request):
+    async def json(self):
+        if not hasattr(self, "_json"):
+            self._json = orjson.loads(await self.body())
+        return self._json
+
+
+class ORJSONRoute(APIRoute):
+    # Render payloads can carry tens of thousands of event rows; orjson decodes them much faster.
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def orjson_handler(request: Request):
+            return await handler(ORJSONRequest(request.scope, request.receive))
+
+        return orjson_handler
+
+
+app = FastAPI(default_response_class=ORJSONResponse)
+app.router.route_class = ORJSONRoute
 
 ASSETS_DIR = Path(__file__).resolve().parent / "assets" / "brand"
 LOGO_NAVY = ASSETS_DIR / "logos" / "PSS_Logo_Navy.png"
 ARCHIVO_REGULAR = ASSETS_DIR / "fonts" / "Archivo-Regular.ttf"
 ARCHIVO_BOLD = ASSETS_DIR / "fonts" / "Archivo-Bold.ttf"
+# PNG output knobs. Lower DPI is the main speed/size lever; lower zlib levels
+# encode slightly faster but produce noticeably larger images for these charts.
+PNG_DPI = int(os.getenv("VIZ_PNG_DPI", "180"))
+PNG_COMPRESS_LEVEL = int(os.getenv("VIZ_PNG_COMPRESS_LEVEL", "6"))
+RENDER_CACHE_SIZE = int(os.getenv("VIZ_RENDER_CACHE_SIZE", "256"))
+PITCH_POOL_SIZE = int(os.getenv("VIZ_PITCH_POOL_SIZE", "4"))
 
 def register_fonts():
     for font_path in (ARCHIVO_REGULAR, ARCHIVO_BOLD):
         if font_path.exists():
             font_manager.fontManager.addfont(str(font_path))
 
-register_fonts()
+plotting_lock = threading.Lock()
+plotting_loaded = False
+
+def load_plotting():
+    # matplotlib, mplsoccer (which pulls in seaborn and scipy) and pandas add over a
+    # second and ~130 MB per worker, so they load on the first render, not at start-up.
+    global plotting_loaded, LOGO_IMAGE, PSS_RGBA
+    global matplotlib, plt, pd, font_manager, LinearSegmentedColormap, to_rgba, Patch, Line2D
+    global Pitch, VerticalPitch, Radar, PyPizza, Bumpy
+    if plotting_loaded:
+        return
+    with plotting_lock:
+        if plotting_loaded:
+            return
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        import pandas as pd
+        from matplotlib import font_manager
+        from matplotlib import image as mpimg
+        from matplotlib.colors import LinearSegmentedColormap, to_rgba
+        from matplotlib.lines import Line2D
+        from matplotlib.patches import Patch
+        from mplsoccer import Pitch, VerticalPitch, Radar, PyPizza, Bumpy
+
+        register_fonts()
+        # Decoded once; the stamp is identical on every chart.
+        LOGO_IMAGE = mpimg.imread(str(LOGO_NAVY)) if LOGO_NAVY.exists() else None
+        # Parsed once so matplotlib skips hex parsing for every artist.
+        PSS_RGBA = tuple(to_rgba(c) for c in PSS_COLORS)
+        plotting_loaded = True
 
 
 @app.get("/health")
@@ -37,6 +91,8 @@ def health():
     return {"status": "ok"}
 
 PSS_COLORS = ["#2E7D6D", "#003C71", "#FFD000", "#1F2E3D"]
+# Client defaults that are swapped for brand colours.
+SERIES_SKIP_COLORS = frozenset({"#6ae0c3", "#f5b861"})
 SHOT_SHAPES = {
     "penalty": "s",
     "shoot": "o",
@@ -47,16 +103,13 @@ SHOT_SHAPES = {
 }
 
 def pick_series_color(idx, current):
-    if current and current not in {"#6ae0c3", "#f5b861"}:
+    if current and current not in SERIES_SKIP_COLORS:
         return current
-    return PSS_COLORS[idx % len(PSS_COLORS)]
+    return PSS_RGBA[idx % len(PSS_RGBA)]
 
 def get_shot_type(row):
-    for key in ("shot_type", "event_type", "event_name"):
-        value = row.get(key)
-        if value:
-            return str(value).strip().lower()
-    return "shot"
+    value = row.get("shot_type") or row.get("event_type") or row.get("event_name")
+    return str(value).strip().lower() if value else "shot"
 
 def get_marker_override(rules, target):
     if not rules:
@@ -74,14 +127,57 @@ def get_highlight_color(rules, rule_type):
             return rule.get("color")
     return None
 
-def in_penalty_area(x_val, y_val):
-    if x_val is None or y_val is None:
-        return False
-    depth = 17.0
-    width = 64.7
-    y_min = (100 - width) / 2
-    y_max = y_min + width
-    return (x_val <= depth or x_val >= 100 - depth) and (y_val >= y_min and y_val <= y_max)
+def series_frame(data, fields):
+    # Only the requested keys are materialized; rows missing a key get NaN.
+    return pd.DataFrame(data, columns=list(dict.fromkeys(fields)))
+
+def extract_columns(frame, fields):
+    # Returns one array per field, keeping only rows where every field is present.
+    mask = frame[list(dict.fromkeys(fields))].notna().all(axis=1).to_numpy()
+    return tuple(frame[field].to_numpy()[mask] for field in fields)
+
+PENALTY_DEPTH = 17.0
+PENALTY_WIDTH = 64.7
+PENALTY_Y_MIN = (100 - PENALTY_WIDTH) / 2
+PENALTY_Y_MAX = PENALTY_Y_MIN + PENALTY_WIDTH
+
+# The custom 100x100 pitch has the same binning extent for every orientation/half,
+# so the 24x16 heatmap grid is fixed. Laid out as mplsoccer's bin_statistic returns it.
+HEATMAP_X_EDGES = np.linspace(0, 100, 25)
+HEATMAP_Y_EDGES = np.linspace(0, 100, 17)
+HEATMAP_X_GRID, HEATMAP_Y_GRID = np.meshgrid(HEATMAP_X_EDGES, HEATMAP_Y_EDGES)
+HEATMAP_Y_GRID = np.flip(HEATMAP_Y_GRID, axis=0)
+HEATMAP_CX, HEATMAP_CY = np.meshgrid(
+    HEATMAP_X_EDGES[:-1] + 0.5 * np.diff(HEATMAP_X_EDGES),
+    HEATMAP_Y_EDGES[:-1] + 0.5 * np.diff(HEATMAP_Y_EDGES),
+)
+HEATMAP_CY = np.flip(HEATMAP_CY, axis=0)
+
+def heatmap_counts(xs, ys):
+    # Equivalent to pitch.bin_statistic(xs, ys, statistic="count", bins=(24, 16)).
+    counts, _, _ = np.histogram2d(
+        np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), bins=[HEATMAP_X_EDGES, HEATMAP_Y_EDGES]
+    )
+    return {
+        "statistic": np.flip(counts.T, axis=0),
+        "x_grid": HEATMAP_X_GRID,
+        "y_grid": HEATMAP_Y_GRID,
+        "cx": HEATMAP_CX,
+        "cy": HEATMAP_CY,
+    }
+
+@lru_cache(maxsize=64)
+def series_cmap(rgba):
+    # Keyed on the parsed colour, so every spelling of a colour shares one colormap.
+    return LinearSegmentedColormap.from_list("series", [(0, 0, 0, 0), rgba])
+
+def split_penalty(xs, ys):
+    # Partitions points into (in_x, in_y, out_x, out_y) for either penalty area.
+    mask = ((xs <= PENALTY_DEPTH) | (xs >= 100 - PENALTY_DEPTH)) & (ys >= PENALTY_Y_MIN) & (ys <= PENALTY_Y_MAX)
+    # Resolve each side to indices once; take() beats repeated boolean indexing.
+    inside = np.flatnonzero(mask)
+    outside = np.flatnonzero(~mask)
+    return xs.take(inside), ys.take(inside), xs.take(outside), ys.take(outside)
 
 
 class RenderRequest(BaseModel):
@@ -102,6 +198,72 @@ class RenderRequest(BaseModel):
     series_label: Optional[str] = None
     marker_rules: Optional[List[dict]] = None
     highlight_rules: Optional[List[dict]] = None
+    cache_bust: Optional[bool] = False
+
+
+@lru_cache(maxsize=4)
+def get_pitch(orientation, half):
+    # Pitch objects only hold geometry, so one per layout is reused across requests.
+    pitch_kwargs = {
+        "pitch_type": "custom",
+        "pitch_length": 100,
+        "pitch_width": 100,
+        "line_color": "#FFFFFF",
+        "line_zorder": 2,
+        "half": half,
+    }
+    return VerticalPitch(**pitch_kwargs) if orientation == "vertical" else Pitch(**pitch_kwargs)
+
+
+# Pre-drawn pitch figures per layout. A figure is checked out by one request at a
+# time; on release everything the request added is stripped before reuse.
+pitch_pools = {}
+pitch_baselines = {}
+pitch_pools_lock = threading.Lock()
+
+
+def acquire_pitch_figure(orientation, half):
+    key = (orientation, half)
+    with pitch_pools_lock:
+        pool = pitch_pools.setdefault(key, [])
+        if pool:
+            fig = pool.pop()
+            return fig, pitch_baselines[fig][1]
+    fig, ax = get_pitch(orientation, half).draw(figsize=(8.4, 5.8))
+    # Detached from pyplot so pooled figures don't count towards its open figures.
+    plt.close(fig)
+    fig.set_facecolor("#ECECEC")
+    ax.set_facecolor("#ECECEC")
+    with pitch_pools_lock:
+        pitch_baselines[fig] = (key, ax, set(ax.get_children()), vars(fig.subplotpars).copy())
+    return fig, ax
+
+
+def release_figure(fig):
+    with pitch_pools_lock:
+        baseline = pitch_baselines.get(fig)
+    if baseline is None:
+        plt.close(fig)
+        return
+    key, ax, children, subplotpars = baseline
+    for artist in ax.get_children():
+        if artist not in children:
+            artist.remove()
+    for extra_ax in fig.axes:
+        if extra_ax is not ax:
+            extra_ax.remove()
+    for text in list(fig.texts):
+        text.remove()
+    fig._suptitle = None
+    fig.legends.clear()
+    ax.set_title("", pad=matplotlib.rcParams["axes.titlepad"])
+    fig.subplots_adjust(**subplotpars)
+    with pitch_pools_lock:
+        pool = pitch_pools[key]
+        if len(pool) < PITCH_POOL_SIZE:
+            pool.append(fig)
+        else:
+            del pitch_baselines[fig]
 
 
 def get_series_list(payload: RenderRequest):
@@ -112,16 +274,21 @@ def get_series_list(payload: RenderRequest):
 
 def fig_to_base64(fig):
     buffer = io.BytesIO()
-    fig.savefig(buffer, format="png", dpi=180, bbox_inches="tight")
-    plt.close(fig)
-    buffer.seek(0)
-    return base64.b64encode(buffer.read()).decode("utf-8")
+    fig.savefig(
+        buffer,
+        format="png",
+        dpi=PNG_DPI,
+        bbox_inches="tight",
+        metadata={"Software": None},
+        pil_kwargs={"compress_level": PNG_COMPRESS_LEVEL},
+    )
+    # Encode straight from the buffer's memory instead of copying the PNG out first.
+    return base64.b64encode(buffer.getbuffer()).decode("ascii")
 
 def add_brand_stamp(fig):
-    if LOGO_NAVY.exists():
-        logo = mpimg.imread(str(LOGO_NAVY))
+    if LOGO_IMAGE is not None:
         ax_logo = fig.add_axes([0.04, 0.005, 0.34, 0.16])
-        ax_logo.imshow(logo)
+        ax_logo.imshow(LOGO_IMAGE)
         ax_logo.axis("off")
     else:
         fig.text(
@@ -158,8 +325,50 @@ def place_bottom_legend(fig, handles, ncol=1):
         labelcolor="#1F2E3D",
     )
 
+# Rendered images keyed by payload hash; repeated requests (dashboard polling,
+# re-asked analyses) skip matplotlib entirely. Bounded LRU, shared by worker threads.
+render_cache = OrderedDict()
+render_cache_lock = threading.Lock()
+
+def render_cache_key(payload: RenderRequest):
+    raw = payload.model_dump_json(exclude={"cache_bust"}).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+def get_cached_render(key):
+    with render_cache_lock:
+        img_base64 = render_cache.get(key)
+        if img_base64 is not None:
+            render_cache.move_to_end(key)
+        return img_base64
+
+def store_render(key, img_base64):
+    if RENDER_CACHE_SIZE <= 0:
+        return
+    with render_cache_lock:
+        render_cache[key] = img_base64
+        render_cache.move_to_end(key)
+        while len(render_cache) > RENDER_CACHE_SIZE:
+            render_cache.popitem(last=False)
+
+def empty_render_key(*parts):
+    # A chart with no data points depends only on layout, labels and styling.
+    raw = repr(("empty",) + parts).encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
 @app.post("/render")
-def render_chart(payload: RenderRequest):
+def render_chart(payload: RenderRequest, response: Response):
+    response.headers["Cache-Control"] = "public, max-age=60"
+    # Keyed before rendering: render_image fills in series colors on the payload.
+    key = render_cache_key(payload)
+    img_base64 = None if payload.cache_bust else get_cached_render(key)
+    if img_base64 is None:
+        img_base64 = render_image(payload)
+        store_render(key, img_base64)
+    return {"image_base64": img_base64, "mime": "image/png"}
+
+
+def render_image(payload: RenderRequest):
+    load_plotting()
     if payload.chart_type.lower() not in {"radar", "pizza", "bumpy"}:
         if not payload.data and not payload.series:
             raise HTTPException(status_code=400, detail="No data provided.")
@@ -173,20 +382,9 @@ def render_chart(payload: RenderRequest):
     end_x_field = payload.end_x_field or "end_x"
     end_y_field = payload.end_y_field or "end_y"
 
+    empty_key = None
     if chart_type in {"shot_map", "pass_map", "heatmap", "pitch_plot", "pass_network"}:
-        pitch_kwargs = {
-            "pitch_type": "custom",
-            "pitch_length": 100,
-            "pitch_width": 100,
-            "line_color": "#FFFFFF",
-            "line_zorder": 2,
-            "half": half,
-        }
-        pitch = VerticalPitch(**pitch_kwargs) if orientation == "vertical" else Pitch(**pitch_kwargs)
-        fig, ax = pitch.draw(figsize=(8.4, 5.8))
-        fig.set_facecolor("#ECECEC")
-        ax.set_facecolor("#ECECEC")
-
+        pitch_orientation = "vertical" if orientation == "vertical" else "horizontal"
         series_list = get_series_list(payload)
         if not series_list:
             series_list = [
@@ -201,127 +399,101 @@ def render_chart(payload: RenderRequest):
         shot_marker_override = get_marker_override(payload.marker_rules, "shot")
         pass_marker_override = get_marker_override(payload.marker_rules, "pass")
         penalty_highlight = get_highlight_color(payload.highlight_rules, "penalty_area")
+        if not payload.cache_bust and all(not series.get("data") for series in series_list):
+            empty_key = empty_render_key(
+                chart_type,
+                pitch_orientation,
+                half,
+                payload.title,
+                payload.subtitle,
+                [(series.get("label", "Series"), series["color"]) for series in series_list],
+                shot_marker_override,
+                pass_marker_override,
+                penalty_highlight,
+            )
+            img_base64 = get_cached_render(empty_key)
+            if img_base64 is not None:
+                return img_base64
+        pitch = get_pitch(pitch_orientation, half)
+        fig, ax = acquire_pitch_figure(pitch_orientation, half)
+        # Shot keys are derived once per series and reused by the legend.
+        shot_types = {}
 
         if chart_type == "heatmap":
             for idx, series in enumerate(series_list):
-                data = series.get("data", [])
-                xs = [row.get(x_field) for row in data if row.get(x_field) is not None]
-                ys = [row.get(y_field) for row in data if row.get(y_field) is not None]
-                if not xs or not ys:
+                frame = series_frame(series.get("data", []), (x_field, y_field))
+                xs, ys = extract_columns(frame, (x_field, y_field))
+                if not xs.size:
                     continue
-                color = series.get("color", PSS_COLORS[idx % len(PSS_COLORS)])
-                cmap = LinearSegmentedColormap.from_list(
-                    f"series_{idx}", [(0, 0, 0, 0), color]
-                )
-                stats = pitch.bin_statistic(xs, ys, statistic="count", bins=(24, 16))
+                color = series.get("color", PSS_RGBA[idx % len(PSS_RGBA)])
+                cmap = series_cmap(to_rgba(color))
+                stats = heatmap_counts(xs, ys)
                 pitch.heatmap(stats, ax=ax, cmap=cmap, alpha=0.65)
         elif chart_type == "pass_network":
             for idx, series in enumerate(series_list):
-                data = series.get("data", [])
-                from_x = [row.get("from_x") for row in data if row.get("from_x") is not None]
-                from_y = [row.get("from_y") for row in data if row.get("from_y") is not None]
-                to_x = [row.get("to_x") for row in data if row.get("to_x") is not None]
-                to_y = [row.get("to_y") for row in data if row.get("to_y") is not None]
-                weights = [row.get("count", 1) for row in data if row.get("from_x") is not None]
-                if not (from_x and from_y and to_x and to_y):
+                frame = series_frame(series.get("data", []), ("from_x", "from_y", "to_x", "to_y", "count"))
+                frame["count"] = frame["count"].fillna(1)
+                from_x, from_y, to_x, to_y, weights = extract_columns(
+                    frame, ("from_x", "from_y", "to_x", "to_y", "count")
+                )
+                if not from_x.size:
                     continue
-                widths = np.clip(np.array(weights), 1, None) / max(np.max(weights), 1) * 6
-                color = series.get("color", PSS_COLORS[idx % len(PSS_COLORS)])
-                for i in range(len(from_x)):
-                    pitch.lines(
-                        from_x[i],
-                        from_y[i],
-                        to_x[i],
-                        to_y[i],
-                        ax=ax,
-                        color=color,
-                        linewidth=widths[i],
-                        alpha=0.7,
-                    )
+                widths = np.maximum(weights, 1.0)
+                widths *= 6.0 / widths.max()
+                color = series.get("color", PSS_RGBA[idx % len(PSS_RGBA)])
+                # One LineCollection for every edge; lines() accepts per-segment widths.
+                pitch.lines(from_x, from_y, to_x, to_y, ax=ax, color=color, linewidth=widths, alpha=0.7)
                 pitch.scatter(from_x, from_y, ax=ax, color=color, s=60, alpha=0.9)
         else:
             for idx, series in enumerate(series_list):
                 data = series.get("data", [])
-                xs = [row.get(x_field) for row in data if row.get(x_field) is not None]
-                ys = [row.get(y_field) for row in data if row.get(y_field) is not None]
-                if not xs or not ys:
+                if chart_type == "shot_map":
+                    frame = series_frame(data, (x_field, y_field))
+                    shot_keys = [get_shot_type(row) for row in data]
+                    shot_types[idx] = list(dict.fromkeys(shot_keys))
+                    frame["_shot_key"] = shot_keys
+                else:
+                    frame = series_frame(data, (x_field, y_field, end_x_field, end_y_field))
+                xs, ys = extract_columns(frame, (x_field, y_field))
+                if not xs.size:
                     continue
-                color = series.get("color", PSS_COLORS[idx % len(PSS_COLORS)])
+                color = series.get("color", PSS_RGBA[idx % len(PSS_RGBA)])
                 if chart_type == "pass_map":
-                    exs = [row.get(end_x_field) for row in data if row.get(end_x_field) is not None]
-                    eys = [row.get(end_y_field) for row in data if row.get(end_y_field) is not None]
-                    if xs and ys and exs and eys:
-                        pitch.arrows(xs, ys, exs, eys, ax=ax, color=color, alpha=0.7, width=2)
+                    axs, ays, exs, eys = extract_columns(frame, (x_field, y_field, end_x_field, end_y_field))
+                    if exs.size:
+                        pitch.arrows(axs, ays, exs, eys, ax=ax, color=color, alpha=0.7, width=2)
                     marker = pass_marker_override or "o"
                     if penalty_highlight:
-                        in_x, in_y, out_x, out_y = [], [], [], []
-                        for row in data:
-                            xv = row.get(x_field)
-                            yv = row.get(y_field)
-                            if xv is None or yv is None:
-                                continue
-                            if in_penalty_area(xv, yv):
-                                in_x.append(xv)
-                                in_y.append(yv)
-                            else:
-                                out_x.append(xv)
-                                out_y.append(yv)
-                        if out_x:
+                        in_x, in_y, out_x, out_y = split_penalty(xs, ys)
+                        if out_x.size:
                             pitch.scatter(out_x, out_y, ax=ax, color=color, s=30, alpha=0.7, marker=marker)
-                        if in_x:
+                        if in_x.size:
                             pitch.scatter(in_x, in_y, ax=ax, color=penalty_highlight, s=30, alpha=0.9, marker=marker)
                     else:
                         pitch.scatter(xs, ys, ax=ax, color=color, s=30, alpha=0.7, marker=marker)
                 elif chart_type == "pitch_plot":
-                    exs = [row.get(end_x_field) for row in data if row.get(end_x_field) is not None]
-                    eys = [row.get(end_y_field) for row in data if row.get(end_y_field) is not None]
+                    axs, ays, exs, eys = extract_columns(frame, (x_field, y_field, end_x_field, end_y_field))
                     marker = pass_marker_override or "o"
                     if penalty_highlight:
-                        in_x, in_y, out_x, out_y = [], [], [], []
-                        for row in data:
-                            xv = row.get(x_field)
-                            yv = row.get(y_field)
-                            if xv is None or yv is None:
-                                continue
-                            if in_penalty_area(xv, yv):
-                                in_x.append(xv)
-                                in_y.append(yv)
-                            else:
-                                out_x.append(xv)
-                                out_y.append(yv)
-                        if out_x:
+                        in_x, in_y, out_x, out_y = split_penalty(xs, ys)
+                        if out_x.size:
                             pitch.scatter(out_x, out_y, ax=ax, color=color, s=30, alpha=0.8, marker=marker)
-                        if in_x:
+                        if in_x.size:
                             pitch.scatter(in_x, in_y, ax=ax, color=penalty_highlight, s=30, alpha=0.9, marker=marker)
                     else:
                         pitch.scatter(xs, ys, ax=ax, color=color, s=30, alpha=0.8, marker=marker)
-                    if exs and eys:
-                        pitch.arrows(xs, ys, exs, eys, ax=ax, color=color, alpha=0.7, width=2)
+                    if exs.size:
+                        pitch.arrows(axs, ays, exs, eys, ax=ax, color=color, alpha=0.7, width=2)
                 else:  # shot_map
-                    grouped = {}
-                    for row in data:
-                        shot_key = get_shot_type(row)
-                        grouped.setdefault(shot_key, []).append(row)
-                    for shot_key, rows in grouped.items():
-                        sxs = [row.get(x_field) for row in rows if row.get(x_field) is not None]
-                        sys = [row.get(y_field) for row in rows if row.get(y_field) is not None]
-                        if not sxs or not sys:
+                    shape_for = SHOT_SHAPES.get
+                    for shot_key, rows in frame.groupby("_shot_key", sort=False):
+                        sxs, sys = extract_columns(rows, (x_field, y_field))
+                        if not sxs.size:
                             continue
-                        marker = shot_marker_override or SHOT_SHAPES.get(shot_key, "o")
+                        marker = shot_marker_override or shape_for(shot_key, "o")
                         if penalty_highlight:
-                            in_x, in_y, out_x, out_y = [], [], [], []
-                            for row in rows:
-                                xv = row.get(x_field)
-                                yv = row.get(y_field)
-                                if xv is None or yv is None:
-                                    continue
-                                if in_penalty_area(xv, yv):
-                                    in_x.append(xv)
-                                    in_y.append(yv)
-                                else:
-                                    out_x.append(xv)
-                                    out_y.append(yv)
-                            if out_x:
+                            in_x, in_y, out_x, out_y = split_penalty(sxs, sys)
+                            if out_x.size:
                                 pitch.scatter(
                                     out_x,
                                     out_y,
@@ -332,7 +504,7 @@ def render_chart(payload: RenderRequest):
                                     edgecolors="black",
                                     marker=marker,
                                 )
-                            if in_x:
+                            if in_x.size:
                                 pitch.scatter(
                                     in_x,
                                     in_y,
@@ -358,7 +530,7 @@ def render_chart(payload: RenderRequest):
             legend_handles = []
             for idx, series in enumerate(series_list):
                 label = series.get("label", "Series")
-                color = series.get("color", PSS_COLORS[idx % len(PSS_COLORS)])
+                color = series.get("color", PSS_RGBA[idx % len(PSS_RGBA)])
                 if chart_type == "shot_map":
                     if shot_marker_override:
                         legend_handles.append(
@@ -374,12 +546,7 @@ def render_chart(payload: RenderRequest):
                             )
                         )
                     else:
-                        data = series.get("data", [])
-                        types = []
-                        for row in data:
-                            shot_key = get_shot_type(row)
-                            if shot_key not in types:
-                                types.append(shot_key)
+                        types = shot_types.get(idx, [])
                         if not types:
                             legend_handles.append(Patch(color=color, label=label))
                         else:
@@ -415,7 +582,6 @@ def render_chart(payload: RenderRequest):
                         legend_handles.append(Patch(color=color, label=label))
             if penalty_highlight:
                 legend_handles.append(Patch(color=penalty_highlight, label="Penalty area"))
-            fig.subplots_adjust(bottom=0.28)
             place_bottom_legend(fig, legend_handles, ncol=1)
     elif chart_type == "radar":
         if not payload.metrics or not payload.values:
@@ -433,7 +599,6 @@ def render_chart(payload: RenderRequest):
             radar.draw_radar(
                 payload.values_compare, ax=ax, kwargs_radar={"color": PSS_COLORS[2], "alpha": 0.6}
             )
-            fig.subplots_adjust(bottom=0.28)
             place_bottom_legend(
                 fig,
                 [
@@ -498,7 +663,6 @@ def render_chart(payload: RenderRequest):
                 Patch(color=PSS_COLORS[i % len(PSS_COLORS)], label=s.get("label", f"Series {i+1}"))
                 for i, s in enumerate(payload.series)
             ]
-            fig.subplots_adjust(bottom=0.28)
             place_bottom_legend(fig, legend_handles, ncol=1)
     else:
         raise HTTPException(status_code=400, detail="Unsupported chart type.")
@@ -507,8 +671,12 @@ def render_chart(payload: RenderRequest):
         fig.suptitle(payload.title, color="#003C71", fontsize=14, fontweight="bold", fontfamily="Archivo")
     if payload.subtitle:
         ax.set_title(payload.subtitle, color="#1F2E3D", fontsize=10, pad=8, fontfamily="Archivo")
+    # Single layout pass for every chart type; legends are anchored in figure coordinates.
     fig.subplots_adjust(bottom=0.28)
     add_brand_stamp(fig)
 
     img_base64 = fig_to_base64(fig)
-    return {"image_base64": img_base64, "mime": "image/png"}
+    release_figure(fig)
+    if empty_key is not None:
+        store_render(empty_key, img_base64)
+    return img_base64